@@ -1,20 +1,18 @@
 import os.path
+import secrets
 import sys
 from http.cookies import SimpleCookie
 from http.server import BaseHTTPRequestHandler
 from urllib.parse import parse_qs
 
 import chevron
-import numpy as np
+from google.api_core.exceptions import NotFound
 from google.cloud.firestore import ArrayRemove, Increment, SERVER_TIMESTAMP, Transaction, transactional
 from google.cloud.firestore_v1.field_path import FieldPath
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from utils.firebase import firestore
-from utils.thompson import ThompsonSampling
-
-# How many votes the prior votes count as
-NUM_PRIOR_VOTES = 5
+from utils.captions import CAPTIONS_COLLECTION, COLUMNS, DISTRIBUTIONS, thompson_sampling
 
 # Where Mustache templates are stored
 TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), '..', 'templates')
@@ -23,6 +21,10 @@ TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), '..', 'templates')
 METADATA_DOCUMENT_PATH = ('meta', 'meta')
 CONTESTS_COLLECTION = 'contests'
 USERS_COLLECTION = 'users'
+ASSIGNMENTS_COLLECTION = 'assignments'
+
+# Size of the seed drawn for each assignment; fits in a Firestore integer
+SEED_BITS = 63
 
 # Which field each score increments
 SCORE_UPDATES = {
@@ -63,81 +65,67 @@ class handler(BaseHTTPRequestHandler):
             return
 
         contest_id = contest_ref.id
-        contest_doc = contest_ref.get()
-        comic = contest_doc.get('comic')
-        summary = contest_doc.get('summary')
-        algorithm = contest_doc.get('algorithm')
-
-        n_arms = len(summary)
-        (
-            prior_funny,
-            prior_somewhat_funny,
-            prior_unfunny,
-            prior_count,
-            observed_funny,
-            observed_somewhat_funny,
-            observed_unfunny,
-            observed_count,
-        ) = (
-            np.array([summary[str(i)][column] for i in range(n_arms)])
-            for column in (
-                'prior_funny',
-                'prior_somewhat_funny',
-                'prior_unfunny',
-                'prior_count',
-                'observed_funny',
-                'observed_somewhat_funny',
-                'observed_unfunny',
-                'observed_count',
-            )
-        )
-
-        prior_success = ((prior_funny + (prior_somewhat_funny * 0.5))
-                         * NUM_PRIOR_VOTES / np.sum(prior_count) + 1)
-        prior_failure = ((prior_unfunny + (prior_somewhat_funny * 0.5))
-                         * NUM_PRIOR_VOTES / np.sum(prior_count) + 1)
-        observed_success = observed_funny + (observed_somewhat_funny * 0.5)
-        observed_failure = observed_unfunny + (observed_somewhat_funny * 0.5)
-
-        if algorithm == 'thompson/beta':
-            thompson = ThompsonSampling(
-                n_arms,
-                prior_success=prior_success,
-                prior_failure=prior_failure,
-                observed_success=observed_success,
-                observed_failure=observed_failure,
-                dist='beta',
-            )
-            caption_ndx = thompson.select_arm()
-        elif algorithm == 'thompson/triangle':
-            thompson = ThompsonSampling(
-                n_arms,
-                prior_success=prior_success,
-                prior_failure=prior_failure,
-                observed_success=observed_success,
-                observed_failure=observed_failure,
-                dist='triangle',
-            )
-            caption_ndx = thompson.select_arm()
-        elif algorithm == 'thompson/normal':
-            thompson = ThompsonSampling(
-                n_arms,
-                prior_success=prior_success,
-                prior_failure=prior_failure,
-                observed_success=observed_success,
-                observed_failure=observed_failure,
-                dist='normal',
-            )
-            caption_ndx = thompson.select_arm()
-        else:
+        contest_doc = contest_ref.get().to_dict()
+        comic = contest_doc['comic']
+        algorithm = contest_doc['algorithm']
+        if algorithm not in DISTRIBUTIONS:
             raise ValueError(f'Unknown algorithm for contest: {contest_id}')
 
-        caption = summary[str(caption_ndx)]['caption']
+        if contest_doc.get('layout') == CAPTIONS_COLLECTION:
+            # Large-arm contests keep each caption in its own document, so
+            # only the candidates that can still win are read and sampled.
+            captions = contest_ref.collection(CAPTIONS_COLLECTION)
+            caption_docs = db.get_all(
+                [captions.document(i) for i in contest_doc['candidates']])
+            summary = {doc.id: doc.to_dict()
+                       for doc in caption_docs if doc.exists}
+            total_prior_count = contest_doc['prior_count']
+            # get_all does not keep the order of the references
+            caption_ids = [i for i in contest_doc['candidates']
+                           if i in summary]
+        else:
+            summary = contest_doc['summary']
+            total_prior_count = sum(row['prior_count']
+                                    for row in summary.values())
+            caption_ids = sorted(summary, key=int)
+
+        if not caption_ids:
+            # Nothing to show for this contest, so move the user on to the
+            # next one rather than leaving them stuck on it
+            users.document(user_id).update({
+                'remaining_contests': ArrayRemove((contest_ref,)),
+            })
+            self.send_response(303)
+            self.send_header('Location', self.path)
+            self.end_headers()
+            return
+
+        # The seed and everything the sampler saw are recorded for every
+        # assignment, so that it can be replayed exactly
+        seed = secrets.randbits(SEED_BITS)
+        thompson = thompson_sampling([summary[i] for i in caption_ids],
+                                     algorithm, total_prior_count, rng=seed)
+        caption_ndx = caption_ids[thompson.select_arm()]
+        db.collection(ASSIGNMENTS_COLLECTION).document().create({
+            'user_id': user_id,
+            'contest_id': contest_id,
+            'algorithm': algorithm,
+            'seed': seed,
+            'caption_ids': caption_ids,
+            'summary': {i: {column: summary[i][column] for column in COLUMNS}
+                        for i in caption_ids},
+            'total_prior_count': total_prior_count,
+            'caption_id': caption_ndx,
+            'timestamp': SERVER_TIMESTAMP,
+        })
+
+        caption = summary[caption_ndx]['caption']
         data = {
             'comic': comic,
             'contest_id': contest_id,
             'caption_id': caption_ndx,
             'caption': caption,
+            'seed': seed,
         }
 
         with open(os.path.join(TEMPLATE_DIR, 'index.mustache'), 'r') as f:
@@ -183,14 +171,38 @@ class handler(BaseHTTPRequestHandler):
                 caption_ndx, = parsed['caption_id']
                 score, = parsed['score']
                 update = SCORE_UPDATES[score]
+                # Caption ids are indexes, which also keeps them usable as
+                # document ids
+                if not caption_ndx.isdigit():
+                    raise ValueError(f'Invalid caption id: {caption_ndx}')
+                contest_ref = contests.document(contest_id)
+                # Pages served before seeds were recorded do not send one
+                seed = int(parsed['seed'][0]) if 'seed' in parsed else None
+                if seed is not None and not 0 <= seed < 2 ** SEED_BITS:
+                    raise ValueError(f'Invalid seed: {seed}')
             except (KeyError, ValueError):
                 self.send_response(400)
                 self.end_headers()
                 return
 
+            # The layout never changes once a contest is written, so it is
+            # read outside the transaction rather than locking the contest
+            # document on every vote. Captions in the contest document are
+            # checked here too, since an increment would create them.
+            caption_path = FieldPath('summary', caption_ndx,
+                                     'caption').to_api_repr()
+            contest_doc = contest_ref.get(('layout', caption_path))
+            layout = (contest_doc.to_dict() or {}).get('layout')
+            try:
+                if layout != CAPTIONS_COLLECTION:
+                    contest_doc.get(caption_path)
+            except KeyError:
+                self.send_response(400)
+                self.end_headers()
+                return
+
             transaction = db.transaction()
             user_ref = users.document(user_id)
-            contest_ref = contests.document(contest_id)
             vote_path = FieldPath('votes', contest_id).to_api_repr()
             count_update_path = FieldPath('summary', caption_ndx,
                                           'observed_count').to_api_repr()
@@ -211,15 +223,30 @@ class handler(BaseHTTPRequestHandler):
                     vote_path: {
                         'caption_id': caption_ndx,
                         'score': score,
+                        'seed': seed,
                         'timestamp': SERVER_TIMESTAMP,
                     },
                 })
-                transaction.update(contest_ref, {
-                    count_update_path: Increment(1),
-                    score_update_path: Increment(1),
-                })
+                if layout == CAPTIONS_COLLECTION:
+                    caption_ref = contest_ref.collection(
+                        CAPTIONS_COLLECTION).document(caption_ndx)
+                    transaction.update(caption_ref, {
+                        'observed_count': Increment(1),
+                        update: Increment(1),
+                    })
+                else:
+                    transaction.update(contest_ref, {
+                        count_update_path: Increment(1),
+                        score_update_path: Increment(1),
+                    })
 
-            update_in_transaction(transaction)
+            try:
+                update_in_transaction(transaction)
+            except NotFound:
+                # The caption does not exist in this contest
+                self.send_response(400)
+                self.end_headers()
+                return
 
         self.send_response(303)
         self.send_header('Location', self.path)
@@ -1,7 +1,9 @@
+import itertools
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.captions import CAPTIONS_COLLECTION
 from utils.firebase import firestore
 
 # Collections to delete
@@ -9,23 +11,35 @@ COLLECTIONS = (
     'meta',
     'contests',
     'users',
+    'assignments',
 )
 
+# Most writes Firestore accepts in a single batch
+MAX_BATCH_WRITES = 500
+
+
+def delete_collection(db, collection, subcollection=None):
+    while True:
+        docs = itertools.islice(collection.list_documents(), MAX_BATCH_WRITES)
+        batch = None
+        for doc in docs:
+            if subcollection is not None:
+                delete_collection(db, doc.collection(subcollection))
+            if batch is None:
+                batch = db.batch()
+            batch.delete(doc)
+        if batch is None:
+            break
+        batch.commit()
+
 
 def main():
     db = firestore()
     for collection_name in COLLECTIONS:
-        collection = db.collection(collection_name)
-        while True:
-            docs = collection.list_documents()
-            batch = None
-            for doc in docs:
-                if batch is None:
-                    batch = db.batch()
-                batch.delete(doc)
-            if batch is None:
-                break
-            batch.commit()
+        # Large-arm contests keep their captions in a subcollection
+        subcollection = (CAPTIONS_COLLECTION if collection_name == 'contests'
+                         else None)
+        delete_collection(db, db.collection(collection_name), subcollection)
         print('Deleted all documents in collection {}'.format(collection_name))
 
 
@@ -9,6 +9,7 @@ from caption_contest_data import summary as get_summary, summary_ids
 from tqdm import tqdm
 
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.captions import CAPTIONS_COLLECTION, select_candidates
 from utils.firebase import firestore
 
 # Scores for each response
@@ -28,6 +29,13 @@ ALGORITHMS = (
 # How many of the top captions to use for each contest
 NUM_TOP_CAPTIONS = 5
 
+# Whether to keep every caption of each contest, one document per caption in a
+# subcollection, instead of only the top captions in the contest document
+LARGE_ARM_MODE = False
+
+# Most writes Firestore accepts in a single batch
+MAX_BATCH_WRITES = 500
+
 # What document stores the metadata for the entire app
 METADATA_DOCUMENT_PATH = ('meta', 'meta')
 
@@ -98,7 +106,8 @@ def main():
         df['score'] = sum(df[response] * score
                           for response, score in SCORES.items()) / df['count']
         df.sort_values('score', ascending=False, inplace=True)
-        df = df.head(NUM_TOP_CAPTIONS)
+        if not LARGE_ARM_MODE:
+            df = df.head(NUM_TOP_CAPTIONS)
         df.reset_index(inplace=True)
         best_score = df['score'].iloc[0]
         df.drop(columns=['score'], inplace=True)
@@ -128,25 +137,44 @@ def main():
 
     db = firestore()
     collection = db.collection(OUTPUT_COLLECTION)
-    batch = db.batch()
+    writes = []
     it = zip(summaries, itertools.cycle(ALGORITHMS))
     all_contests = []
 
     for (contest_id, summary), algorithm in it:
         contest_ref = collection.document(str(contest_id))
-        batch.set(contest_ref, {
-            'comic': get_comic(contest_id),
-            'summary': summary.to_dict(orient='index'),
-            'algorithm': algorithm,
-        })
+        summary = summary.to_dict(orient='index')
+        if LARGE_ARM_MODE:
+            captions = contest_ref.collection(CAPTIONS_COLLECTION)
+            for caption_id, row in summary.items():
+                writes.append((captions.document(caption_id), row))
+            prior_count = sum(row['prior_count'] for row in summary.values())
+            writes.append((contest_ref, {
+                'comic': get_comic(contest_id),
+                'layout': CAPTIONS_COLLECTION,
+                'prior_count': prior_count,
+                'candidates': select_candidates(summary),
+                'algorithm': algorithm,
+            }))
+        else:
+            writes.append((contest_ref, {
+                'comic': get_comic(contest_id),
+                'summary': summary,
+                'algorithm': algorithm,
+            }))
         all_contests.append(contest_ref)
 
-    batch.set(db.document(*METADATA_DOCUMENT_PATH), {
+    # Written last so that no user is given a contest before its captions
+    writes.append((db.document(*METADATA_DOCUMENT_PATH), {
         'contests': all_contests,
-    })
+    }))
 
     print(f'Writing {len(summaries)} contests to Firestore...')
-    batch.commit()
+    for start in tqdm(range(0, len(writes), MAX_BATCH_WRITES)):
+        batch = db.batch()
+        for ref, data in writes[start:start + MAX_BATCH_WRITES]:
+            batch.set(ref, data)
+        batch.commit()
     print('Done!')
 
 
@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.captions import CAPTIONS_COLLECTION, select_candidates
+from utils.firebase import firestore
+
+# What collection the contests are stored in
+CONTESTS_COLLECTION = 'contests'
+
+
+def main():
+    '''Recompute the candidate captions of every large-arm contest.
+
+    Votes only ever go to candidates, so a pruned caption can become a
+    candidate again when the leaders' posteriors shift. Run this periodically
+    to pick those captions back up.
+    '''
+
+    db = firestore()
+    contests = db.collection(CONTESTS_COLLECTION)
+    query = contests.where('layout', '==', CAPTIONS_COLLECTION)
+    for contest_doc in query.stream():
+        captions = contest_doc.reference.collection(CAPTIONS_COLLECTION)
+        summary = {doc.id: doc.to_dict() for doc in captions.stream()}
+        candidates = select_candidates(summary)
+        contest_doc.reference.update({'candidates': candidates})
+        print(f'Contest {contest_doc.id}: {len(candidates)} of '
+              f'{len(summary)} captions are candidates')
+
+
+if __name__ == '__main__':
+    main()
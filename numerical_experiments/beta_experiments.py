@@ -1,8 +1,9 @@
+import os
+
 import numpy as np
 import caption_contest_data as ccd
-from utils.experiment import Experiment
-from utils.thompson import ThompsonSampling
-from matplotlib import pyplot as plt
+from utils.experiment import run_replications
+from utils.results import ResultStore
 big_prior_idx = np.array([554, 564, 568, 570, 573, 575, 578, 580, 583, 585, 587, 590, 595,
                           598, 602, 604, 607, 609, 611, 613, 615, 617, 619, 621, 624, 626,
                           628, 630, 632, 634, 662, 665, 667, 669, 671, 673, 675, 677, 679,
@@ -10,51 +11,66 @@ big_prior_idx = np.array([554, 564, 568, 570, 573, 575, 578, 580, 583, 585, 587,
 big_prior_idx = big_prior_idx[:10]
 
 
+# Where each contest's replications are streamed to
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results', 'beta')
+
+# How many independent runs to make for each contest
+NUM_REPLICATIONS = 20
+
+# How many rounds each run lasts
+TRIALS = 1000
+
+# Root seed that every replication's seed is derived from
+SEED = 8803
+
+
+def main():
+    for prior_idx in big_prior_idx:
+
+        df = ccd.summary(prior_idx).query('rank == 1 or rank == 5 or rank == 10')
+        priors = (np.array(df['funny']) + np.array(df['somewhat_funny']) * 0.5) / \
+            (np.array(df['funny']) + np.array(df['unfunny'] + np.array(df['somewhat_funny']))) 
 
-results = {}
 
-for prior_idx in big_prior_idx:
+        true_funny = np.array(df['funny']) / \
+            (np.array(df['funny']) + np.array(df['unfunny'] + np.array(df['somewhat_funny']))) 
 
-    df = ccd.summary(prior_idx).query('rank == 1 or rank == 5 or rank == 10')
-    priors = (np.array(df['funny']) + np.array(df['somewhat_funny']) * 0.5) / \
-        (np.array(df['funny']) + np.array(df['unfunny'] + np.array(df['somewhat_funny']))) 
+        true_unfunny = np.array(df['unfunny']) / \
+            (np.array(df['funny']) + np.array(df['unfunny'] + np.array(df['somewhat_funny']))) 
 
+        true_somewhat = np.array(df['somewhat_funny']) / \
+            (np.array(df['funny']) + np.array(df['unfunny'] + np.array(df['somewhat_funny']))) 
 
-    true_funny = np.array(df['funny']) / \
-        (np.array(df['funny']) + np.array(df['unfunny'] + np.array(df['somewhat_funny']))) 
+        prior_succ = np.round(priors * 10)
+        prior_fail = np.round((1 - priors) * 10)
 
-    true_unfunny = np.array(df['unfunny']) / \
-        (np.array(df['funny']) + np.array(df['unfunny'] + np.array(df['somewhat_funny']))) 
+        store = ResultStore(os.path.join(RESULTS_DIR, str(prior_idx)),
+                            n_replications=NUM_REPLICATIONS,
+                            trials=TRIALS,
+                            n_arms=priors.shape[0])
 
-    true_somewhat = np.array(df['somewhat_funny']) / \
-        (np.array(df['funny']) + np.array(df['unfunny'] + np.array(df['somewhat_funny']))) 
+        exp_kwargs = dict(num_arms=priors.shape[0],
+                          true_funny = true_funny, 
+                          true_unfunny = true_unfunny,
+                          true_somewhat = true_somewhat,
+                          prior_succ=prior_succ,
+                          prior_fail=prior_fail, 
+                          dist='triangle',
+                          trials=TRIALS)
 
-    prior_succ = np.round(priors * 10)
-    prior_fail = np.round((1 - priors) * 10)
+        # Replication i always gets seed i of this contest, so a resumed or
+        # parallel sweep produces exactly the same runs as a serial one
+        seeds = np.random.SeedSequence(SEED, spawn_key=(int(prior_idx),)).spawn(NUM_REPLICATIONS)
+        for result in run_replications(exp_kwargs, seeds[store.completed:]):
+            store.append(result)
 
-    exp = Experiment(num_arms=priors.shape[0],
-                    true_funny = true_funny, 
-                    true_unfunny = true_unfunny,
-                    true_somewhat = true_somewhat,
-                    prior_succ=prior_succ,
-                    prior_fail=prior_fail, 
-                    dist='triangle',
-                    trials=1000)
+        print('---------------------')
+        print(prior_idx)
+        print(store.prob_best_arm())
+        print(store.mean_regret()[-1])
 
-    results[prior_idx] = exp.run_experiment()
-    
+    print(f'Results written to {RESULTS_DIR}; plot them with plot_results.py')
 
-for res in results.keys():
-    print('---------------------')
-    print(results[res]['opt_arm'])
-    print(results[res]['true_opt_arm'])
-    print(results[res]['sample_means'])
-    print(results[res]['N_pulled'])
-    
-    plt.figure()
-    plt.plot((results[res]['regret']))
 
-plt.show(block=False)
-plt.pause(0.001) # Pause for interval seconds.
-input("hit[enter] to end.")
-plt.close('all') 
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -9,21 +9,26 @@ big_prior_idx = np.array([554, 564, 568, 570, 573, 575, 578, 580, 583, 585, 587,
                           681, 683, 685, 687, 689, 691])
 big_prior_idx = big_prior_idx[:2]
 
+# Seed for the prior noise and the simulated votes
+SEED = 8803
 
 
 results = {}
+rng = np.random.default_rng(SEED)
 
 for prior_idx in big_prior_idx:
 
     df = ccd.summary(prior_idx).query('rank <= 10')
     true_means = np.array(df['funny']) / (np.array(df['funny']) + np.array(df['unfunny'])) 
     prior_means = np.array(df['funny']) / (np.array(df['funny']) + np.array(df['unfunny'])) + \
-                    np.array([np.random.triangular(-np.min(true_means), 0, (1 - np.max(true_means))) for i in range(10)])
+                    np.array([rng.triangular(-np.min(true_means), 0, (1 - np.max(true_means))) for i in range(10)])
     prior_succ = np.round(prior_means * 100)
     prior_fail = np.round((1 - prior_means) * 100)
 
-    exp = Experiment(num_arms=true_means.shape[0], true_means=true_means, prior_succ=prior_succ, prior_fail=prior_fail, dist='normal',
-                 trials=10000)
+    # Votes here are only funny or unfunny
+    exp = Experiment(num_arms=true_means.shape[0], true_funny=true_means, true_unfunny=1 - true_means,
+                 true_somewhat=np.zeros_like(true_means), prior_succ=prior_succ, prior_fail=prior_fail, dist='normal',
+                 trials=10000, rng=rng)
 
     results[prior_idx] = exp.run_experiment()
     
@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import pyplot as plt
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.results import METADATA_FILE, ResultStore
+
+# Lower and upper quantiles to shade around the mean regret curve
+QUANTILES = (0.1, 0.9)
+
+
+def main():
+    '''Plot the regret curves of every store under a results directory.'''
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('results_dir',
+                        help='directory written by an experiment script')
+    parser.add_argument('--output-dir',
+                        help='where to save the plots (default: results_dir)')
+    args = parser.parse_args()
+    output_dir = args.output_dir or args.results_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    for name in sorted(os.listdir(args.results_dir)):
+        path = os.path.join(args.results_dir, name)
+        if not os.path.exists(os.path.join(path, METADATA_FILE)):
+            continue
+        store = ResultStore.load(path)
+        if store.completed == 0:
+            continue
+
+        mean = store.mean_regret()
+        lower, upper = store.quantile_regret(QUANTILES)
+
+        fig, ax = plt.subplots()
+        ax.plot(mean, label='mean')
+        ax.fill_between(range(store.trials), lower, upper, alpha=0.3,
+                        label=f'{QUANTILES[0]:.0%}-{QUANTILES[1]:.0%} quantiles')
+        ax.set_title(f'{name} (P(best arm) = {store.prob_best_arm():.2f}, '
+                     f'n = {store.completed})')
+        ax.set_xlabel('trial')
+        ax.set_ylabel('regret')
+        ax.legend()
+        fig.savefig(os.path.join(output_dir, f'{name}.png'))
+        plt.close(fig)
+
+        print(f'{name}: P(best arm) = {store.prob_best_arm():.3f} '
+              f'over {store.completed}/{store.n_replications} replications')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.captions import MAX_CANDIDATES, select_candidates, thompson_sampling
+
+
+def make_caption(funny, somewhat_funny, unfunny):
+    return {
+        'prior_funny': funny,
+        'prior_somewhat_funny': somewhat_funny,
+        'prior_unfunny': unfunny,
+        'prior_count': funny + somewhat_funny + unfunny,
+        'observed_funny': 0,
+        'observed_somewhat_funny': 0,
+        'observed_unfunny': 0,
+        'observed_count': 0,
+        'caption': 'caption',
+    }
+
+
+def make_contest(n_strong=10, n_weak=2990, seed=0):
+    rng = np.random.default_rng(seed)
+    captions = {}
+    for i in range(n_strong + n_weak):
+        count = int(rng.integers(20, 61))
+        rate = 0.8 if i < n_strong else 0.1
+        funny = int(rng.binomial(count, rate))
+        captions[str(i)] = make_caption(funny, 0, count - funny)
+    return captions
+
+
+def test_dominated_captions_are_pruned():
+    captions = make_contest()
+    candidates = select_candidates(captions)
+    assert set(candidates) == {str(i) for i in range(10)}
+
+
+def test_candidates_are_capped_and_ranked_by_mean():
+    captions = {str(i): make_caption(10, 0, 10) for i in range(2 * MAX_CANDIDATES)}
+    captions['7'] = make_caption(12, 0, 8)
+    candidates = select_candidates(captions)
+    assert len(candidates) == MAX_CANDIDATES
+    assert candidates[0] == '7'
+
+
+def test_voted_candidates_are_kept():
+    captions = {str(i): make_caption(10, 0, 10) for i in range(3000)}
+    candidates = select_candidates(captions)
+    for i in candidates:
+        captions[i]['observed_funny'] = 6
+        captions[i]['observed_unfunny'] = 4
+        captions[i]['observed_count'] = 10
+    captions[candidates[0]]['observed_funny'] = 10
+    captions[candidates[0]]['observed_unfunny'] = 0
+    reselected = select_candidates(captions)
+    assert reselected[0] == candidates[0]
+    assert set(reselected) == set(candidates)
+
+
+def test_seed_replays_selection():
+    captions = make_contest(n_strong=20, n_weak=20)
+    rows = [captions[i] for i in sorted(captions, key=int)]
+    total_prior_count = sum(row['prior_count'] for row in rows)
+    for algorithm in ('thompson/beta', 'thompson/triangle', 'thompson/normal'):
+        for seed in range(20):
+            arms = {thompson_sampling(rows, algorithm, total_prior_count,
+                                      rng=seed).select_arm()
+                    for _ in range(3)}
+            assert len(arms) == 1
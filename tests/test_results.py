@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils import results
+from utils.results import ResultStore
+
+N_REPLICATIONS = 6
+TRIALS = 50
+N_ARMS = 3
+
+
+def make_result(rng):
+    return {
+        'regret': np.cumsum(rng.random(TRIALS)),
+        'sample_means': rng.random(N_ARMS),
+        'opt_arm': int(rng.integers(N_ARMS)),
+        'true_opt_arm': 0,
+        'N_pulled': rng.integers(0, TRIALS, N_ARMS).astype(float),
+    }
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Force the aggregates to be computed over several chunks
+    monkeypatch.setattr(results, 'CHUNK_ELEMENTS', 64)
+
+
+def test_resume_matches_numpy(tmp_path):
+    rng = np.random.default_rng(0)
+    expected = [make_result(rng) for _ in range(N_REPLICATIONS)]
+    path = str(tmp_path / 'store')
+
+    store = ResultStore(path, N_REPLICATIONS, TRIALS, N_ARMS)
+    for result in expected[:4]:
+        store.append(result)
+    # A half-written row past `completed` must not leak into the aggregates
+    store.regret[4] = 1e9
+    store.regret.flush()
+
+    store = ResultStore.load(path)
+    assert store.completed == 4
+    for result in expected[4:]:
+        store.append(result)
+
+    store = ResultStore.load(path)
+    regret = np.array([result['regret'] for result in expected])
+    assert store.is_complete()
+    np.testing.assert_array_equal(store.regret, regret)
+    np.testing.assert_allclose(store.mean_regret(), regret.mean(axis=0))
+    np.testing.assert_allclose(store.quantile_regret([0.1, 0.5, 0.9]),
+                               np.quantile(regret, [0.1, 0.5, 0.9], axis=0))
+    assert store.prob_best_arm() == np.mean(
+        [result['opt_arm'] == 0 for result in expected])
+
+
+def test_reopen_with_different_shape(tmp_path):
+    path = str(tmp_path / 'store')
+    ResultStore(path, N_REPLICATIONS, TRIALS, N_ARMS)
+    with pytest.raises(ValueError):
+        ResultStore(path, N_REPLICATIONS, TRIALS + 1, N_ARMS)
+
+
+def test_append_to_full_store(tmp_path):
+    rng = np.random.default_rng(0)
+    store = ResultStore(str(tmp_path / 'store'), 1, TRIALS, N_ARMS)
+    store.append(make_result(rng))
+    with pytest.raises(IndexError):
+        store.append(make_result(rng))
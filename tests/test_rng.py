@@ -0,0 +1,84 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utils.experiment import Experiment, run_replications
+from utils.results import ResultStore
+from utils.rng import RandomBuffer
+
+DISTS = ('beta', 'triangle', 'normal')
+
+N_REPLICATIONS = 5
+
+
+def exp_kwargs(dist, trials=300):
+    true_funny = np.array([0.3, 0.2, 0.1])
+    true_somewhat = np.array([0.3, 0.3, 0.3])
+    return dict(num_arms=3,
+                true_funny=true_funny,
+                true_unfunny=1 - true_funny - true_somewhat,
+                true_somewhat=true_somewhat,
+                prior_succ=np.full(3, 3.0),
+                prior_fail=np.full(3, 3.0),
+                dist=dist,
+                trials=trials)
+
+
+def test_random_buffer_refills_in_bulk():
+    calls = []
+    rng = np.random.default_rng(0)
+
+    def draw(size):
+        calls.append(size)
+        return rng.random(size)
+
+    buffer = RandomBuffer(draw, shape=(2,), size=4)
+    values = np.array([buffer.next() for _ in range(10)])
+    assert calls == [(4, 2)] * 3
+    np.testing.assert_array_equal(values,
+                                  np.random.default_rng(0).random((12, 2))[:10])
+
+
+@pytest.mark.parametrize('dist', DISTS)
+def test_experiment_is_reproducible(dist):
+    first = Experiment(**exp_kwargs(dist), rng=1).run_experiment()
+    second = Experiment(**exp_kwargs(dist), rng=1).run_experiment()
+    other = Experiment(**exp_kwargs(dist), rng=2).run_experiment()
+    np.testing.assert_array_equal(first['regret'], second['regret'])
+    np.testing.assert_array_equal(first['N_pulled'], second['N_pulled'])
+    assert not np.array_equal(first['regret'], other['regret'])
+
+
+@pytest.mark.parametrize('dist', DISTS)
+def test_process_pool_matches_serial(dist):
+    seeds = np.random.SeedSequence(0).spawn(N_REPLICATIONS)
+    serial = [Experiment(**exp_kwargs(dist), rng=seed).run_experiment()
+              for seed in seeds]
+    parallel = list(run_replications(exp_kwargs(dist), seeds, max_workers=2))
+    for a, b in zip(serial, parallel):
+        np.testing.assert_array_equal(a['regret'], b['regret'])
+        np.testing.assert_array_equal(a['N_pulled'], b['N_pulled'])
+
+
+def test_resume_gives_the_same_rows(tmp_path):
+    kwargs = exp_kwargs('triangle')
+    seeds = np.random.SeedSequence(0).spawn(N_REPLICATIONS)
+
+    full = ResultStore(str(tmp_path / 'full'), N_REPLICATIONS, kwargs['trials'], 3)
+    for result in run_replications(kwargs, seeds[full.completed:], max_workers=2):
+        full.append(result)
+
+    path = str(tmp_path / 'resumed')
+    store = ResultStore(path, N_REPLICATIONS, kwargs['trials'], 3)
+    for result in run_replications(kwargs, seeds[:2], max_workers=2):
+        store.append(result)
+    store = ResultStore.load(path)
+    for result in run_replications(kwargs, seeds[store.completed:], max_workers=2):
+        store.append(result)
+
+    np.testing.assert_array_equal(store.regret, full.regret)
+    np.testing.assert_array_equal(store.N_pulled, full.N_pulled)
+    np.testing.assert_array_equal(store.opt_arm, full.opt_arm)
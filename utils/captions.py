@@ -0,0 +1,105 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from utils.thompson import ThompsonSampling
+
+# How many votes the prior votes count as
+NUM_PRIOR_VOTES = 5
+
+# Subcollection of a large-arm contest holding one document per caption
+CAPTIONS_COLLECTION = 'captions'
+
+# Which distribution each algorithm samples from
+DISTRIBUTIONS = {
+    'thompson/beta': 'beta',
+    'thompson/triangle': 'triangle',
+    'thompson/normal': 'normal',
+}
+
+# Most captions a large-arm contest samples from on each request
+MAX_CANDIDATES = 50
+
+# Vote counts stored for each caption
+COLUMNS = (
+    'prior_funny',
+    'prior_somewhat_funny',
+    'prior_unfunny',
+    'prior_count',
+    'observed_funny',
+    'observed_somewhat_funny',
+    'observed_unfunny',
+    'observed_count',
+)
+
+
+def thompson_sampling(rows: Sequence[Dict[str, float]], algorithm: str,
+                      total_prior_count: float,
+                      rng=None) -> ThompsonSampling:
+    '''Build the sampler for a set of captions.
+
+    `total_prior_count` is the prior count summed over every caption in the
+    contest, not just `rows`, so that a subset of captions gets the same
+    posterior it would have alongside the rest of the contest. Passing the
+    same `rng` seed for the same rows replays the same selection.
+    '''
+    (
+        prior_funny,
+        prior_somewhat_funny,
+        prior_unfunny,
+        prior_count,
+        observed_funny,
+        observed_somewhat_funny,
+        observed_unfunny,
+        observed_count,
+    ) = (np.array([row[column] for row in rows]) for column in COLUMNS)
+
+    prior_success = ((prior_funny + (prior_somewhat_funny * 0.5))
+                     * NUM_PRIOR_VOTES / total_prior_count + 1)
+    prior_failure = ((prior_unfunny + (prior_somewhat_funny * 0.5))
+                     * NUM_PRIOR_VOTES / total_prior_count + 1)
+    observed_success = observed_funny + (observed_somewhat_funny * 0.5)
+    observed_failure = observed_unfunny + (observed_somewhat_funny * 0.5)
+
+    return ThompsonSampling(
+        len(rows),
+        prior_success=prior_success,
+        prior_failure=prior_failure,
+        observed_success=observed_success,
+        observed_failure=observed_failure,
+        dist=DISTRIBUTIONS[algorithm],
+        rng=rng,
+    )
+
+
+def select_candidates(captions: Dict[str, Dict[str, float]]) -> List[str]:
+    '''Ids of the captions that are not clearly dominated by another caption,
+    at most `MAX_CANDIDATES` of them, highest mean first.
+
+    Unlike `thompson_sampling`, the prior votes are not scaled down here. The
+    scaled priors are deliberately weak, so with thousands of captions their
+    bounds all cover [0, 1] and nothing would ever be pruned.
+    '''
+    caption_ids = list(captions)
+    (
+        prior_funny,
+        prior_somewhat_funny,
+        prior_unfunny,
+        prior_count,
+        observed_funny,
+        observed_somewhat_funny,
+        observed_unfunny,
+        observed_count,
+    ) = (np.array([captions[i][column] for i in caption_ids])
+         for column in COLUMNS)
+
+    thompson = ThompsonSampling(
+        len(caption_ids),
+        prior_success=prior_funny + (prior_somewhat_funny * 0.5) + 1,
+        prior_failure=prior_unfunny + (prior_somewhat_funny * 0.5) + 1,
+        observed_success=observed_funny + (observed_somewhat_funny * 0.5),
+        observed_failure=observed_unfunny + (observed_somewhat_funny * 0.5),
+        dist='beta',
+    )
+    return [caption_ids[ndx]
+            for ndx in thompson.candidate_arms(MAX_CANDIDATES)]
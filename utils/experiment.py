@@ -1,8 +1,17 @@
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
+from utils.rng import RandomBuffer
 from utils.thompson import ThompsonSampling
+
+# How many rounds of random numbers to draw at once
+BUFFER_SIZE = 1024
+
 class Experiment:
     def __init__(self, num_arms=None, true_funny=None, true_unfunny=None, true_somewhat=None,
-                 prior_succ=None, prior_fail=None, dist='beta', trials=1000):
+                 prior_succ=None, prior_fail=None, dist='beta', trials=1000, rng=None):
         self.prior_succ = prior_succ
         self.prior_fail = prior_fail
         self.num_arms = num_arms
@@ -13,10 +22,15 @@ class Experiment:
         self.dist = dist
         self.trials=trials
         self.optimal_arm = np.argmax(self.true_means)
-        self.thomp = ThompsonSampling(self.num_arms, self.prior_succ, self.prior_fail, dist=self.dist)
+        # One generator drives both the sampler and the rewards, so a run is
+        # fully determined by `rng` (a Generator, a SeedSequence or a seed)
+        self.rng = np.random.default_rng(rng)
+        self.rewards = RandomBuffer(self.rng.random, size=min(BUFFER_SIZE, self.trials))
+        self.thomp = ThompsonSampling(self.num_arms, self.prior_succ, self.prior_fail, dist=self.dist,
+                                      rng=self.rng, buffer_size=min(BUFFER_SIZE, self.trials))
 
     def sample_reward(self, arm):
-        rand_num = np.random.random()
+        rand_num = self.rewards.next()
         rew = 1 if rand_num < self.true_funny[arm] else (0 if rand_num < self.true_funny[arm] + self.true_somewhat[arm] else -1)
         return rew
 
@@ -45,4 +59,24 @@ class Experiment:
                 'N_pulled': self.thomp.arm_pulled,
                  }
 
-            
+
+def run_replication(exp_kwargs, seed):
+    return Experiment(**exp_kwargs, rng=seed).run_experiment()
+
+
+def run_replications(exp_kwargs, seeds, max_workers=None):
+    '''Run one replication per seed in a process pool, yielding the results
+    in seed order.
+
+    At most `max_workers` replications are in flight at once, so finished
+    results never pile up behind a slow one.
+    '''
+    max_workers = max_workers or os.cpu_count()
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for seed in seeds:
+            if len(pending) == max_workers:
+                yield pending.popleft().result()
+            pending.append(pool.submit(run_replication, exp_kwargs, seed))
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,141 @@
+import json
+import os
+from typing import Dict, Iterable
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+# Name of the file holding the shape of the store and its progress
+METADATA_FILE = 'meta.json'
+
+# Most regret values to load from disk at once when aggregating
+CHUNK_ELEMENTS = 1 << 22
+
+
+class ResultStore:
+    '''Memory-mapped, on-disk results for the replications of one experiment.
+
+    Each replication is written straight to ``.npy`` memmaps as soon as it
+    finishes, so a sweep does not need to keep its regret curves in memory and
+    can be resumed from ``completed`` after being interrupted. The mean regret
+    curve and the number of replications that picked the best arm are kept up
+    to date as replications are appended.
+    '''
+
+    def __init__(self, path, n_replications, trials, n_arms):
+        self.path = path
+        self.n_replications = n_replications
+        self.trials = trials
+        self.n_arms = n_arms
+
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, METADATA_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            shape = (meta['n_replications'], meta['trials'], meta['n_arms'])
+            if shape != (n_replications, trials, n_arms):
+                raise ValueError(f'Store at {path} has shape {shape}, '
+                                 f'expected {(n_replications, trials, n_arms)}')
+            self.completed = meta['completed']
+            mode = 'r+'
+        else:
+            self.completed = 0
+            mode = 'w+'
+
+        self.regret = self._open('regret', mode, np.float64,
+                                 (n_replications, trials))
+        self.sample_means = self._open('sample_means', mode, np.float64,
+                                       (n_replications, n_arms))
+        self.N_pulled = self._open('N_pulled', mode, np.float64,
+                                   (n_replications, n_arms))
+        self.opt_arm = self._open('opt_arm', mode, np.int64,
+                                  (n_replications,))
+        self.true_opt_arm = self._open('true_opt_arm', mode, np.int64,
+                                       (n_replications,))
+
+        # Rows past `completed` may hold a half-written replication, so the
+        # running aggregates are always rebuilt from the committed rows.
+        self.regret_sum = np.zeros((trials,))
+        rows = max(1, CHUNK_ELEMENTS // trials)
+        for start in range(0, self.completed, rows):
+            end = min(start + rows, self.completed)
+            self.regret_sum += np.sum(self.regret[start:end], axis=0)
+        self.n_best = int(np.sum(self.opt_arm[:self.completed]
+                                 == self.true_opt_arm[:self.completed]))
+
+        if mode == 'w+':
+            self._write_metadata()
+
+    @classmethod
+    def load(cls, path):
+        '''Open an existing store using the shape recorded in its metadata.'''
+        with open(os.path.join(path, METADATA_FILE), 'r') as f:
+            meta = json.load(f)
+        return cls(path, meta['n_replications'], meta['trials'], meta['n_arms'])
+
+    def _open(self, name, mode, dtype, shape):
+        return open_memmap(os.path.join(self.path, f'{name}.npy'),
+                           mode=mode, dtype=dtype, shape=shape)
+
+    def _write_metadata(self):
+        meta_path = os.path.join(self.path, METADATA_FILE)
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump({
+                'n_replications': self.n_replications,
+                'trials': self.trials,
+                'n_arms': self.n_arms,
+                'completed': self.completed,
+            }, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    def is_complete(self):
+        return self.completed >= self.n_replications
+
+    def append(self, result: Dict[str, np.ndarray]):
+        '''Write the output of ``Experiment.run_experiment`` as the next
+        replication.'''
+        if self.is_complete():
+            raise IndexError(f'Store at {self.path} already holds '
+                             f'{self.n_replications} replications')
+
+        i = self.completed
+        self.regret[i] = result['regret']
+        self.sample_means[i] = result['sample_means']
+        self.N_pulled[i] = result['N_pulled']
+        self.opt_arm[i] = result['opt_arm']
+        self.true_opt_arm[i] = result['true_opt_arm']
+        for array in (self.regret, self.sample_means, self.N_pulled,
+                      self.opt_arm, self.true_opt_arm):
+            array.flush()
+
+        # Only count the replication once everything it wrote is on disk
+        self.completed += 1
+        self._write_metadata()
+        self.regret_sum += result['regret']
+        self.n_best += int(result['opt_arm'] == result['true_opt_arm'])
+
+    def mean_regret(self):
+        return self.regret_sum / max(self.completed, 1)
+
+    def quantile_regret(self, q: Iterable[float]):
+        '''Exact quantiles of the regret curves at every time step.
+
+        The curves are read from disk a few time steps at a time, as many as
+        fit in `CHUNK_ELEMENTS` values, so memory stays bounded until there
+        are more than `CHUNK_ELEMENTS` replications, after which one time
+        step of every replication is loaded at once.
+        '''
+        q = np.asarray(q)
+        out = np.zeros(q.shape + (self.trials,))
+        if self.completed == 0:
+            return out
+        width = max(1, CHUNK_ELEMENTS // self.completed)
+        for start in range(0, self.trials, width):
+            chunk = self.regret[:self.completed, start:start + width]
+            out[..., start:start + width] = np.quantile(chunk, q, axis=0)
+        return out
+
+    def prob_best_arm(self):
+        '''Fraction of replications whose chosen arm is the true best arm.'''
+        return self.n_best / max(self.completed, 1)
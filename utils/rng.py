@@ -0,0 +1,24 @@
+class RandomBuffer:
+    '''Hands out draws from a `numpy.random.Generator` one at a time while
+    drawing them from the generator in bulk.
+
+    `draw` is a generator method such as `rng.random` that accepts `size`.
+    The sequence of values depends only on the generator's seed and `size`,
+    so a buffered run is as reproducible as an unbuffered one.
+    '''
+
+    def __init__(self, draw, shape=(), size=1024):
+        self.draw = draw
+        self.shape = tuple(shape)
+        self.size = size
+        self.buffer = None
+        self.pos = size
+
+    def next(self):
+        if self.pos == self.size:
+            self.buffer = self.draw(size=(self.size,) + self.shape)
+            self.pos = 0
+        value = self.buffer[self.pos]
+        self.pos += 1
+        return value
+
@@ -1,9 +1,12 @@
 import numpy as np
 
+from utils.rng import RandomBuffer
+
 
 class ThompsonSampling:
     def __init__(self, n_arms, prior_success, prior_failure,
-                 observed_success=None, observed_failure=None, dist='beta'):
+                 observed_success=None, observed_failure=None, dist='beta',
+                 rng=None, buffer_size=1):
         self.n_arms = n_arms
         self.prior_success = np.array(prior_success)
         self.prior_fails = np.array(prior_failure)
@@ -16,23 +19,60 @@ class ThompsonSampling:
         self.arm_pulled = np.zeros((self.n_arms))
         self.means = np.zeros((self.n_arms,))
         self.dist = dist
+        # `rng` may be a Generator, a SeedSequence or a seed. Draws for the
+        # triangle and normal samplers are taken `buffer_size` rounds at a
+        # time, so simulations should pass a large one.
+        self.rng = np.random.default_rng(rng)
+        if self.dist == 'triangle':
+            self.buffer = RandomBuffer(self.rng.random, (self.n_arms,),
+                                       buffer_size)
+        elif self.dist == 'normal':
+            self.buffer = RandomBuffer(self.rng.standard_normal,
+                                       (self.n_arms,), buffer_size)
 
     def select_arm(self):
         if self.dist == 'beta':
-            cur_means = [np.random.beta(self.prior_success[i] + self.observed_success[i], self.prior_fails[i] + self.observed_failure[i]) for i in range(self.n_arms)]
+            cur_means = self.rng.beta(self.prior_success + self.observed_success, self.prior_fails + self.observed_failure)
         elif self.dist == 'triangle':
             
             mode = (self.prior_success + self.observed_success)/ (self.prior_success + self.observed_success+ self.prior_fails + self.observed_failure) 
             var = np.exp(-0.01*(self.prior_success + self.observed_success + self.prior_fails + self.observed_failure))
-            cur_means = [np.random.triangular(mode[i] - var[i],mode[i], mode[i] + var[i]) for i in range(self.n_arms)]
+            # Inverse CDF of the symmetric triangular distribution on
+            # [mode - var, mode + var]
+            u = self.buffer.next()
+            cur_means = np.where(u < 0.5,
+                                 mode - var + var * np.sqrt(2 * u),
+                                 mode + var - var * np.sqrt(2 * (1 - u)))
         elif self.dist == 'normal':
 
             mean = (self.prior_success + self.observed_success)/ (self.prior_success + self.observed_success+ self.prior_fails + self.observed_failure)
             var = np.exp(-0.01*(self.prior_success + self.observed_success + self.prior_fails + self.observed_failure))
-            cur_means  = np.clip([np.random.normal(loc=mean[i],scale=var[i]) for i in range(self.n_arms)], 0,1)
+            cur_means  = np.clip(mean + var * self.buffer.next(), 0,1)
 
         return np.argmax(cur_means)
 
+    def posterior_bounds(self, z=3):
+        '''Lower and upper bounds on each arm's mean that the sampled means
+        almost never leave, used to prune arms that cannot win.'''
+        success = self.prior_success + self.observed_success
+        failure = self.prior_fails + self.observed_failure
+        mean = success / (success + failure)
+        if self.dist == 'beta':
+            spread = z * np.sqrt(success * failure / ((success + failure) ** 2 * (success + failure + 1)))
+        elif self.dist == 'triangle':
+            spread = np.exp(-0.01*(success + failure))
+        elif self.dist == 'normal':
+            spread = z * np.exp(-0.01*(success + failure))
+        return np.clip(mean - spread, 0, 1), np.clip(mean + spread, 0, 1)
+
+    def candidate_arms(self, max_candidates=None, z=3):
+        '''Arms whose upper bound reaches the best lower bound, highest
+        posterior mean first.'''
+        lower, upper = self.posterior_bounds(z)
+        order = np.argsort(-self.prior_sample_means(), kind='stable')
+        order = order[upper[order] >= np.max(lower)]
+        return order[:max_candidates]
+
     def register_funny(self, arm):
         self.observed_success[arm] += 1
         self.arm_pulled[arm] += 1
@@ -64,7 +104,7 @@ def main():
     for i in range(1000):
         arm = thomp.select_arm()
 
-        success = np.random.random() < true_means[arm]
+        success = thomp.rng.random() < true_means[arm]
 
         if success:
             thomp.register_success(arm)